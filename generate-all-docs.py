@@ -10,38 +10,36 @@ Generate markdown documentation for all atopile library components, interfaces,
 Uses AST parsing to extract real docstrings and information from source files.
 """
 
+from __future__ import annotations
+
+import argparse
 import ast
 import json
+import os
+import subprocess
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 import importlib
 import inspect
 import textwrap
 
-import faebryk.library._F as F
-
-
-from faebryk.core.node import Node
-from faebryk.core.module import Module
-from faebryk.core.moduleinterface import ModuleInterface
-from faebryk.core.trait import Trait
-from faebryk.core.parameter import Parameter
-from atopile.attributes import GlobalAttributes
-from atopile import attributes
-
-from atopile.mcp.tools.library import _get_library_nodes
+# The atopile runtime is expensive to import, so it is only loaded by the
+# stages that need it. `nav` and `check` work without atopile installed.
+if TYPE_CHECKING:
+    import faebryk.library._F as F
+    from faebryk.core.node import Node
+    from faebryk.core.moduleinterface import ModuleInterface
+    from faebryk.core.parameter import Parameter
 
-# Base path to the atopile library source
-LIBRARY_PATH = Path(F.__file__).parent
-ATTRIBUTES_PATH = Path(attributes.__file__)
 BASE_DOC_PATH = Path(__file__).parent / "atopile" / "api-reference"
+DOCS_JSON_PATH = Path(__file__).parent / "docs.json"
 
-doc_types = {"component": Module, "interface": ModuleInterface, "trait": Trait}
+# Set in the child process spawned by --importtime to avoid re-spawning
+IMPORTTIME_CHILD_ENV = "GENERATE_DOCS_IMPORTTIME_CHILD"
 
 icons = {"component": "microchip", "interface": "right-left", "trait": "right-left"}
 
-data_types = {"parameter": Parameter, "interface": ModuleInterface, "trait": Trait}
-
 # Not all traits are functional or reasonable to expose to users
 functional_trait_names = [
     "can_bridge",
@@ -133,7 +131,13 @@ def generate_dummy_value(param_type, param_name: str):
     return None
 
 
-def create_library_node(name: str, t: type[Node] = Node) -> Optional[Node]:
+def create_library_node(name: str, t: Optional[type[Node]] = None) -> Optional[Node]:
+    import faebryk.library._F as F
+    from faebryk.core.node import Node
+
+    if t is None:
+        t = Node
+
     try:
         if (
             name not in F.__dict__
@@ -203,6 +207,8 @@ def create_library_node(name: str, t: type[Node] = Node) -> Optional[Node]:
 
 
 def get_global_attributes():
+    from atopile.attributes import GlobalAttributes
+
     props = []
     for name, obj in vars(GlobalAttributes).items():
         if isinstance(obj, property):
@@ -223,10 +229,12 @@ def get_global_attributes():
 
 def get_init_args(node_name: str) -> list:
     """Get descriptive text for traits from their actual source files."""
+    import faebryk.library._F as F
+
     init_args = []
 
     # Path to the trait file in the atopile source
-    trait_file_path = LIBRARY_PATH / f"{node_name}.py"
+    trait_file_path = Path(F.__file__).parent / f"{node_name}.py"
     if not trait_file_path.exists():
         return init_args
     try:
@@ -356,6 +364,8 @@ def generate_node_markdown(
     global_attributes_docstring: Optional[str],
 ) -> str:
     """Generate the complete markdown documentation for a module."""
+    from faebryk.core.trait import Trait
+    from atopile.attributes import GlobalAttributes
 
     node_name = node_data["name"]
 
@@ -429,7 +439,7 @@ def generate_node_markdown(
 
 def clear_existing_docs():
     """Clear existing documentation files in components, interfaces, and traits directories."""
-    base_path = Path(__file__).parent / "atopile" / "api-reference"
+    base_path = BASE_DOC_PATH
 
     directories_to_clear = ["components", "interfaces", "traits"]
     total_cleared = 0
@@ -460,6 +470,15 @@ def clear_existing_docs():
 
 def generate_all_docs():
     """Generate documentation for all library components, interfaces, and traits."""
+    import faebryk.library._F as F
+    from faebryk.core.module import Module
+    from faebryk.core.moduleinterface import ModuleInterface
+    from faebryk.core.trait import Trait
+    from faebryk.core.parameter import Parameter
+    from atopile.mcp.tools.library import _get_library_nodes
+
+    doc_types = {"component": Module, "interface": ModuleInterface, "trait": Trait}
+
     clear_existing_docs()
 
     # Get global attributes
@@ -509,37 +528,59 @@ def generate_all_docs():
                     f.write(content)
 
 
-def update_navigation():
-    """Update docs.json Library Reference section with only existing files in api-reference folder."""
-    docs_json_path = Path(__file__).parent / "docs.json"
+def find_library_reference_group(docs_config: dict) -> Optional[dict]:
+    """Return the Library Reference group of the atopile tab in docs.json, if any."""
+    for tab in docs_config["navigation"].get("tabs", []):
+        if tab["tab"] == "atopile":
+            for group in tab["groups"]:
+                if group["group"] == "Library Reference":
+                    return group
+            break
+    return None
+
+
+def find_missing_nav_pages(library_reference: dict) -> List[str]:
+    """List pages referenced in the Library Reference group that have no .mdx file."""
+    missing_files = []
+    for page_group in library_reference.get("pages", []):
+        if isinstance(page_group, dict) and "pages" in page_group:
+            for page_path in page_group["pages"]:
+                # Convert docs.json path to actual file path
+                if page_path.startswith("atopile/api-reference/"):
+                    relative_path = page_path.replace("atopile/api-reference/", "")
+                    actual_file_path = BASE_DOC_PATH / f"{relative_path}.mdx"
+                    if not actual_file_path.exists():
+                        missing_files.append(page_path)
+    return missing_files
+
+
+def scan_reference_pages() -> Dict[str, List[str]]:
+    """Collect the navigation entries for every .mdx file in api-reference, by group."""
+    pages = {}
+    for group_name in ["Components", "Interfaces", "Traits"]:
+        dir_name = group_name.lower()
+        dir_path = BASE_DOC_PATH / dir_name
+        pages[group_name] = [
+            f"atopile/api-reference/{dir_name}/{file_path.stem}"
+            for file_path in sorted(dir_path.glob("*.mdx"))
+            if file_path.is_file()
+        ]
+    return pages
+
 
+def update_navigation(dry_run: bool = False):
+    """Update docs.json Library Reference section with only existing files in api-reference folder."""
     # Read the existing docs.json
-    with open(docs_json_path) as f:
+    with open(DOCS_JSON_PATH) as f:
         docs_config = json.load(f)
 
-    # Scan actual folders for .mdx files and validate they exist
-    base_path = Path(__file__).parent / "atopile" / "api-reference"
+    library_reference = find_library_reference_group(docs_config)
+    if library_reference is None:
+        print("⚠️  Warning: Library Reference section not found in docs.json")
+        return
 
     # First, check what's currently in docs.json and validate if those files exist
-    current_missing_files = []
-    for tab in docs_config["navigation"]["tabs"]:
-        if tab["tab"] == "atopile":
-            for group in tab["groups"]:
-                if group["group"] == "Library Reference":
-                    for page_group in group.get("pages", []):
-                        if isinstance(page_group, dict) and "pages" in page_group:
-                            for page_path in page_group["pages"]:
-                                # Convert docs.json path to actual file path
-                                if page_path.startswith("atopile/api-reference/"):
-                                    relative_path = page_path.replace(
-                                        "atopile/api-reference/", ""
-                                    )
-                                    actual_file_path = (
-                                        base_path / f"{relative_path}.mdx"
-                                    )
-                                    if not actual_file_path.exists():
-                                        current_missing_files.append(page_path)
-
+    current_missing_files = find_missing_nav_pages(library_reference)
     if current_missing_files:
         print(
             f"🗑️  Found {len(current_missing_files)} missing files in current docs.json:"
@@ -552,100 +593,167 @@ def update_navigation():
     else:
         print("✅ All files in current docs.json exist in filesystem\n")
 
-    # Get components pages - only include files that actually exist
-    components_pages = []
-    components_path = base_path / "components"
-    if components_path.exists():
-        for file_path in sorted(components_path.glob("*.mdx")):
-            if file_path.is_file() and file_path.exists():
-                components_pages.append(
-                    f"atopile/api-reference/components/{file_path.stem}"
-                )
-
-    # Get interfaces pages - only include files that actually exist
-    interfaces_pages = []
-    interfaces_path = base_path / "interfaces"
-    if interfaces_path.exists():
-        for file_path in sorted(interfaces_path.glob("*.mdx")):
-            if file_path.is_file() and file_path.exists():
-                interfaces_pages.append(
-                    f"atopile/api-reference/interfaces/{file_path.stem}"
-                )
-
-    # Get traits pages - only include files that actually exist
-    traits_pages = []
-    traits_path = base_path / "traits"
-    if traits_path.exists():
-        for file_path in sorted(traits_path.glob("*.mdx")):
-            if file_path.is_file() and file_path.exists():
-                traits_pages.append(f"atopile/api-reference/traits/{file_path.stem}")
-
-    # Find and completely replace the Library Reference group
-    library_reference_found = False
-    for tab in docs_config["navigation"]["tabs"]:
-        if tab["tab"] == "atopile":
-            for group in tab["groups"]:
-                if group["group"] == "Library Reference":
-                    library_reference_found = True
-
-                    # Store old counts for comparison
-                    old_pages = group.get("pages", [])
-                    old_component_count = 0
-                    old_interface_count = 0
-                    old_trait_count = 0
-
-                    for page_group in old_pages:
-                        if isinstance(page_group, dict):
-                            if page_group.get("group") == "Components":
-                                old_component_count = len(page_group.get("pages", []))
-                            elif page_group.get("group") == "Interfaces":
-                                old_interface_count = len(page_group.get("pages", []))
-                            elif page_group.get("group") == "Traits":
-                                old_trait_count = len(page_group.get("pages", []))
-
-                    # Completely replace the Library Reference section with only existing files
-                    group["pages"] = [
-                        {"group": "Components", "pages": components_pages},
-                        {"group": "Interfaces", "pages": interfaces_pages},
-                        {"group": "Traits", "pages": traits_pages},
-                    ]
-
-                    print("Updated Library Reference section:")
-                    print(
-                        f"  Components: {old_component_count} → {len(components_pages)} pages"
-                    )
-                    print(
-                        f"  Interfaces: {old_interface_count} → {len(interfaces_pages)} pages"
-                    )
-                    print(f"  Traits: {old_trait_count} → {len(traits_pages)} pages")
-
-                    # Report any significant changes
-                    if old_component_count != len(components_pages):
-                        diff = len(components_pages) - old_component_count
-                        print(f"  📝 Components: {'+' if diff > 0 else ''}{diff} files")
-                    if old_interface_count != len(interfaces_pages):
-                        diff = len(interfaces_pages) - old_interface_count
-                        print(f"  📝 Interfaces: {'+' if diff > 0 else ''}{diff} files")
-                    if old_trait_count != len(traits_pages):
-                        diff = len(traits_pages) - old_trait_count
-                        print(f"  📝 Traits: {'+' if diff > 0 else ''}{diff} files")
-
-                    break
-            break
-
-    if not library_reference_found:
-        print("⚠️  Warning: Library Reference section not found in docs.json")
+    # Scan actual folders for .mdx files - only include files that actually exist
+    new_pages = scan_reference_pages()
+
+    # Store old counts for comparison
+    old_counts = {group_name: 0 for group_name in new_pages}
+    for page_group in library_reference.get("pages", []):
+        if isinstance(page_group, dict) and page_group.get("group") in old_counts:
+            old_counts[page_group["group"]] = len(page_group.get("pages", []))
+
+    # Completely replace the Library Reference section with only existing files
+    library_reference["pages"] = [
+        {"group": group_name, "pages": pages}
+        for group_name, pages in new_pages.items()
+    ]
+
+    print("Updated Library Reference section:")
+    for group_name, pages in new_pages.items():
+        print(f"  {group_name}: {old_counts[group_name]} → {len(pages)} pages")
+
+    # Report any significant changes
+    for group_name, pages in new_pages.items():
+        if old_counts[group_name] != len(pages):
+            diff = len(pages) - old_counts[group_name]
+            print(f"  📝 {group_name}: {'+' if diff > 0 else ''}{diff} files")
+
+    if dry_run:
+        print("\n🔍 Dry run: docs.json was not modified")
         return
 
     # Write back the updated config (preserving everything else)
-    with open(docs_json_path, "w") as f:
+    with open(DOCS_JSON_PATH, "w") as f:
         json.dump(docs_config, f, indent=2)
 
     print("\n✅ Updated navigation in docs.json")
-    print(f"📁 Scanned: {base_path}")
+    print(f"📁 Scanned: {BASE_DOC_PATH}")
     print("🔄 Only existing .mdx files are included in navigation")
 
 
+def check_navigation() -> int:
+    """Check that docs.json and the api-reference folder agree. Returns an exit code."""
+    with open(DOCS_JSON_PATH) as f:
+        docs_config = json.load(f)
+
+    library_reference = find_library_reference_group(docs_config)
+    if library_reference is None:
+        print("❌ Library Reference section not found in docs.json")
+        return 1
+
+    missing_files = find_missing_nav_pages(library_reference)
+    listed_pages = {
+        page_path
+        for page_group in library_reference.get("pages", [])
+        if isinstance(page_group, dict)
+        for page_path in page_group.get("pages", [])
+    }
+    unlisted_files = [
+        page_path
+        for pages in scan_reference_pages().values()
+        for page_path in pages
+        if page_path not in listed_pages
+    ]
+
+    for missing_file in missing_files:
+        print(f"❌ In docs.json but missing on disk: {missing_file}")
+    for unlisted_file in unlisted_files:
+        print(f"❌ On disk but missing from docs.json: {unlisted_file}")
+
+    if missing_files or unlisted_files:
+        print("\nRun `generate-all-docs.py nav` to update docs.json")
+        return 1
+
+    print("✅ docs.json Library Reference matches api-reference folder")
+    return 0
+
+
+def report_import_times(argv: List[str], top: int) -> int:
+    """Re-run this script under `-X importtime` and summarise the slowest imports."""
+    env = dict(os.environ, **{IMPORTTIME_CHILD_ENV: "1"})
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, *argv],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    # Lines look like: "import time:       123 |        456 |   package.module"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        imports.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    total_us = sum(self_us for _, self_us, _ in imports)
+    print(f"\n⏱️  Import time: {total_us / 1000:.1f} ms across {len(imports)} modules")
+    print(f"{'cumulative [ms]':>16} {'self [ms]':>10}  module")
+    for cumulative_us, self_us, name in sorted(imports, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>16.1f} {self_us / 1000:>10.1f}  {name}")
+
+    return result.returncode
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="report a breakdown of module import times after running",
+    )
+    parser.add_argument(
+        "--importtime-top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="number of slowest imports to list in the report (default: 20)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    generate_parser = subparsers.add_parser(
+        "generate",
+        help="regenerate the api-reference pages and docs.json navigation (default)",
+    )
+    generate_parser.add_argument(
+        "--skip-nav",
+        action="store_true",
+        help="do not update docs.json after generating pages",
+    )
+    nav_parser = subparsers.add_parser(
+        "nav", help="update docs.json navigation from existing pages"
+    )
+    nav_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="report navigation changes without writing docs.json",
+    )
+    subparsers.add_parser(
+        "check", help="verify docs.json navigation matches existing pages"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.importtime and not os.environ.get(IMPORTTIME_CHILD_ENV):
+        return report_import_times(argv, args.importtime_top)
+
+    if args.command == "nav":
+        update_navigation(dry_run=args.dry_run)
+    elif args.command == "check":
+        return check_navigation()
+    else:
+        generate_all_docs()
+        if not getattr(args, "skip_nav", False):
+            update_navigation()
+
+    return 0
+
+
 if __name__ == "__main__":
-    generate_all_docs()
-    update_navigation()
+    sys.exit(main())